@@ -3,9 +3,9 @@
 Analyze the trained ML model performance and characteristics
 """
 
-import pickle
+import joblib
 import numpy as np
-import pandas as pd
+from sklearn.inspection import permutation_importance
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import matplotlib.pyplot as plt
 import os
@@ -15,15 +15,11 @@ def analyze_model():
     print("🔬 Smart Traffic Control - ML Model Analysis")
     print("=" * 50)
     
-    # Load the model and scaler
+    # Load the model
     try:
-        with open('models/traffic_model.pkl', 'rb') as f:
-            model = pickle.load(f)
+        model = joblib.load('models/traffic_model.pkl')
         
-        with open('models/scaler.pkl', 'rb') as f:
-            scaler = pickle.load(f)
-        
-        print("✅ Model and scaler loaded successfully")
+        print("✅ Model loaded successfully")
         
     except Exception as e:
         print(f"❌ Error loading model: {e}")
@@ -31,14 +27,10 @@ def analyze_model():
     
     # Generate test data (same as training data generation)
     print("\n🧪 Generating test data...")
-    test_data = generate_test_data(500)  # 500 test samples
-    
-    X_test = test_data[['hour', 'day_of_week', 'weather']]
-    y_test = test_data['traffic_flow']
+    X_test, y_test = generate_test_data(500)  # 500 test samples
     
     # Make predictions
-    X_test_scaled = scaler.transform(X_test)
-    y_pred = model.predict(X_test_scaled)
+    y_pred = model.predict(X_test)
     
     # Calculate metrics
     mae = mean_absolute_error(y_test, y_pred)
@@ -53,7 +45,10 @@ def analyze_model():
     
     # Feature importance
     feature_names = ['Hour of Day', 'Day of Week', 'Weather']
-    importances = model.feature_importances_
+    # Gradient boosting has no impurity importances; measure how much shuffling
+    # each feature hurts the score instead, normalized to sum to 1
+    result = permutation_importance(model, X_test, y_test, n_repeats=5, random_state=42)
+    importances = result.importances_mean / result.importances_mean.sum()
     
     print("\n🔍 Feature Importance:")
     for name, importance in zip(feature_names, importances):
@@ -64,11 +59,9 @@ def analyze_model():
     print("  Hour | Day | Weather | Actual | Predicted | Difference")
     print("  -----|-----|---------|--------|-----------|----------")
     
-    for i in range(min(10, len(test_data))):
-        hour = int(X_test.iloc[i]['hour'])
-        day = int(X_test.iloc[i]['day_of_week'])
-        weather = int(X_test.iloc[i]['weather'])
-        actual = int(y_test.iloc[i])
+    for i in range(min(10, len(y_test))):
+        hour, day, weather = (int(value) for value in X_test[i])
+        actual = int(y_test[i])
         predicted = int(y_pred[i])
         diff = abs(actual - predicted)
         
@@ -79,18 +72,15 @@ def analyze_model():
     
     # Rush hour analysis
     print("\n🚗 Rush Hour Analysis:")
-    rush_hours = test_data[
-        ((test_data['hour'] >= 7) & (test_data['hour'] <= 11)) |
-        ((test_data['hour'] >= 16) & (test_data['hour'] <= 21))
-    ]
+    hours = X_test[:, 0]
+    rush_hours = ((hours >= 7) & (hours <= 11)) | ((hours >= 16) & (hours <= 21))
     
-    if len(rush_hours) > 0:
-        rush_actual = rush_hours['traffic_flow']
-        rush_X = scaler.transform(rush_hours[['hour', 'day_of_week', 'weather']])
-        rush_pred = model.predict(rush_X)
+    if rush_hours.any():
+        rush_actual = y_test[rush_hours]
+        rush_pred = y_pred[rush_hours]
         rush_mae = mean_absolute_error(rush_actual, rush_pred)
         
-        print(f"  🕐 Rush Hour Samples: {len(rush_hours)}")
+        print(f"  🕐 Rush Hour Samples: {rush_hours.sum()}")
         print(f"  📊 Average Rush Hour Traffic: {rush_actual.mean():.0f} vehicles")
         print(f"  🎯 Rush Hour Prediction Error: {rush_mae:.2f} vehicles")
     
@@ -108,40 +98,32 @@ def analyze_model():
     }
 
 def generate_test_data(n_samples=500):
-    """Generate test data using same logic as training"""
-    import random
-    
-    data = []
-    for _ in range(n_samples):
-        hour = random.randint(0, 23)
-        day_of_week = random.randint(0, 6)
-        weather = random.choice([0, 1, 2])  # 0=sunny, 1=rainy, 2=cloudy
+    """Generate test features (hour, day_of_week, weather) and traffic flows"""
+    rng = np.random.default_rng()
+    hour = rng.integers(0, 24, n_samples)
+    day_of_week = rng.integers(0, 7, n_samples)
+    weather = rng.integers(0, 3, n_samples)  # 0=sunny, 1=rainy, 2=cloudy
 
-        # Simulate realistic Indian traffic patterns
-        base_flow = 80  # Higher base flow for Indian cities
-        if 7 <= hour <= 11 or 16 <= hour <= 21:  # Extended rush hours
-            base_flow += random.randint(150, 300)  # Much higher congestion
-        elif 12 <= hour <= 15:  # Afternoon traffic
-            base_flow += random.randint(50, 100)
-        elif 22 <= hour or hour <= 5:  # Night time
-            base_flow -= random.randint(30, 50)
+    # Simulate realistic Indian traffic patterns
+    rush = ((hour >= 7) & (hour <= 11)) | ((hour >= 16) & (hour <= 21))
+    afternoon = (hour >= 12) & (hour <= 15)
+    night = (hour >= 22) | (hour <= 5)
 
-        if day_of_week >= 5:  # Weekend (still busy in Indian cities)
-            base_flow -= random.randint(20, 40)  # Less reduction than Western cities
+    base_flow = np.full(n_samples, 80)  # Higher base flow for Indian cities
+    base_flow += np.where(rush, rng.integers(150, 301, n_samples), 0)  # Much higher congestion
+    base_flow += np.where(afternoon, rng.integers(50, 101, n_samples), 0)  # Afternoon traffic
+    base_flow -= np.where(night, rng.integers(30, 51, n_samples), 0)  # Night time
 
-        if weather == 1:  # Monsoon/rainy weather (major impact in India)
-            base_flow += random.randint(40, 80)  # Higher impact due to poor drainage
+    # Weekend (still busy in Indian cities)
+    base_flow -= np.where(day_of_week >= 5, rng.integers(20, 41, n_samples), 0)  # Less reduction than Western cities
 
-        traffic_flow = max(0, base_flow + random.randint(-30, 30))
+    # Monsoon/rainy weather (major impact in India)
+    base_flow += np.where(weather == 1, rng.integers(40, 81, n_samples), 0)  # Higher impact due to poor drainage
 
-        data.append({
-            'hour': hour,
-            'day_of_week': day_of_week,
-            'weather': weather,
-            'traffic_flow': traffic_flow
-        })
+    traffic_flow = np.clip(base_flow + rng.integers(-30, 31, n_samples), 0, None)
 
-    return pd.DataFrame(data)
+    X = np.column_stack([hour, day_of_week, weather]).astype(np.int32)
+    return X, traffic_flow.astype(np.int32)
 
 def main():
     if not os.path.exists('models/traffic_model.pkl'):
@@ -0,0 +1,71 @@
+"""
+Database access for the Smart Traffic Control System
+"""
+
+from datetime import datetime
+
+from .buffer import TrafficBuffer
+from .pool import ConnectionPool
+from .schema import CONGESTION_LEVELS, INTERSECTIONS, init_schema
+
+DB_PATH = "traffic_data.db"
+
+# Process-wide pool shared by the app and the helper scripts
+pool = ConnectionPool(DB_PATH)
+get_connection = pool.get_connection
+
+
+def bulk_insert_traffic(rows):
+    """Insert a batch of traffic_data rows in a single transaction
+
+    Rows are (sensor_id, timestamp, vehicle_count, avg_speed,
+    congestion_level_id, predicted_flow) tuples. The analytics totals are
+    updated in the same transaction.
+    """
+    # Fold the batch into the analytics totals
+    hourly_totals = {}
+    congestion_totals = {}
+    for _, timestamp, vehicle_count, avg_speed, level, _ in rows:
+        hour = datetime.fromisoformat(timestamp).hour
+        totals = hourly_totals.setdefault(hour, [0, 0.0, 0])
+        totals[0] += vehicle_count
+        totals[1] += avg_speed
+        totals[2] += 1
+        congestion_totals[level] = congestion_totals.get(level, 0) + 1
+
+    # BEGIN IMMEDIATE takes the write lock up front, so the transaction
+    # cannot fail half way with SQLITE_BUSY
+    with get_connection() as conn, conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            """
+            INSERT INTO traffic_data 
+            (sensor_id, timestamp, vehicle_count, avg_speed, congestion_level_id,
+             predicted_flow)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            rows,
+        )
+        conn.executemany(
+            """
+            INSERT INTO agg_hourly (hour, sum_vehicles, sum_speed, n)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(hour) DO UPDATE SET
+                sum_vehicles = sum_vehicles + excluded.sum_vehicles,
+                sum_speed = sum_speed + excluded.sum_speed,
+                n = n + excluded.n
+        """,
+            [(hour, *totals) for hour, totals in hourly_totals.items()],
+        )
+        conn.executemany(
+            """
+            INSERT INTO agg_congestion (congestion_level_id, n)
+            VALUES (?, ?)
+            ON CONFLICT(congestion_level_id) DO UPDATE SET n = n + excluded.n
+        """,
+            list(congestion_totals.items()),
+        )
+
+
+# Rows staged by the collector, written out periodically by the app
+traffic_buffer = TrafficBuffer(bulk_insert_traffic)
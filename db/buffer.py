@@ -0,0 +1,46 @@
+"""
+In-memory staging for traffic_data rows, written out in batches
+"""
+
+import threading
+from collections import deque
+
+
+class TrafficBuffer:
+    """Collects traffic_data rows until the next flush
+
+    Rows are (sensor_id, timestamp, vehicle_count, avg_speed,
+    congestion_level_id, predicted_flow) tuples; flush() hands everything
+    collected so far to the writer in a single call.
+    """
+
+    def __init__(self, writer):
+        self._writer = writer
+        self._rows = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def record(self, rows):
+        """Stage rows for the next flush"""
+        with self._lock:
+            self._rows.extend(rows)
+
+    def flush(self):
+        """Write out all staged rows and return how many there were"""
+        with self._lock:
+            rows = list(self._rows)
+            self._rows.clear()
+        if not rows:
+            return 0
+
+        try:
+            self._writer(rows)
+        except Exception:
+            # Put the rows back in front of anything staged since, so the
+            # next flush retries them in order
+            with self._lock:
+                self._rows.extendleft(reversed(rows))
+            raise
+        return len(rows)
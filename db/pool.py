@@ -0,0 +1,148 @@
+"""
+SQLite connection pool with separate reader and writer connections
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Applied to every pooled connection
+CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA busy_timeout=5000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-20000;
+"""
+
+
+class ConnectionPool:
+    """Pool of up to max_size read-only connections and one writer
+
+    SQLite only allows one writer at a time, so writes are serialized through
+    a single dedicated connection and a long dashboard read never holds up
+    the ingest loop. Connections are opened on demand; readers idle for more
+    than idle_timeout seconds are closed, keeping at least min_size open.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_size=None,
+        min_size=1,
+        connection_timeout=30.0,
+        idle_timeout=300.0,
+    ):
+        self.path = path
+        self.max_size = max_size or os.cpu_count() or 4
+        self.min_size = min_size
+        self.connection_timeout = connection_timeout
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        # Idle readers as (connection, released_at) pairs, oldest first
+        self._readers = queue.Queue()
+        self._reader_count = 0
+        self._writer = queue.Queue(maxsize=1)
+        self._writer_opened = False
+
+    def _connect(self, readonly):
+        # Autocommit mode; writers manage their own transactions
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        conn.executescript(CONNECTION_PRAGMAS)
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _wait(self, connections):
+        try:
+            return connections.get(timeout=self.connection_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No database connection available after "
+                f"{self.connection_timeout} seconds"
+            ) from None
+
+    def _acquire_reader(self):
+        now = time.monotonic()
+        while True:
+            try:
+                conn, released_at = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                expired = (
+                    now - released_at > self.idle_timeout
+                    and self._reader_count > self.min_size
+                )
+                if expired:
+                    self._reader_count -= 1
+            if not expired:
+                return conn
+            conn.close()
+
+        with self._lock:
+            can_open = self._reader_count < self.max_size
+            if can_open:
+                self._reader_count += 1
+        if can_open:
+            try:
+                return self._connect(readonly=True)
+            except Exception:
+                with self._lock:
+                    self._reader_count -= 1
+                raise
+        return self._wait(self._readers)[0]
+
+    def _acquire_writer(self):
+        with self._lock:
+            can_open = not self._writer_opened
+            self._writer_opened = True
+        if can_open:
+            try:
+                return self._connect(readonly=False)
+            except Exception:
+                with self._lock:
+                    self._writer_opened = False
+                raise
+        return self._wait(self._writer)
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        """Borrow a connection, returning it to the pool afterwards"""
+        if readonly:
+            conn = self._acquire_reader()
+        else:
+            conn = self._acquire_writer()
+        try:
+            yield conn
+        finally:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+            if readonly:
+                self._readers.put((conn, time.monotonic()))
+            else:
+                self._writer.put(conn)
+
+    def close(self):
+        """Close the idle connections held by the pool"""
+        while True:
+            try:
+                conn, _ = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._reader_count -= 1
+        try:
+            self._writer.get_nowait().close()
+            with self._lock:
+                self._writer_opened = False
+        except queue.Empty:
+            pass
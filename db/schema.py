@@ -0,0 +1,183 @@
+"""
+Database schema and lookup data, shared by the app and the setup script
+"""
+
+# Monitored intersections: (sensor name, city, congestion tier)
+INTERSECTIONS = (
+    ("delhi_cp", "Delhi", "high"),
+    ("delhi_iffco", "Delhi", "high"),
+    ("delhi_lajpat", "Delhi", "medium"),
+    ("delhi_dwarka", "Delhi", "low"),
+    ("blr_silk", "Bengaluru", "high"),
+    ("blr_electronic", "Bengaluru", "high"),
+    ("blr_jayanagar", "Bengaluru", "medium"),
+    ("blr_hebbal", "Bengaluru", "low"),
+    ("mumbai_bandra", "Mumbai", "high"),
+    ("mumbai_andheri", "Mumbai", "medium"),
+    ("chennai_adyar", "Chennai", "medium"),
+    ("chennai_omr", "Chennai", "low"),
+)
+
+# Congestion levels as (id, label); the ids double as the tier codes
+CONGESTION_LEVELS = ((0, "Low"), (1, "Medium"), (2, "High"))
+
+
+def init_schema(conn):
+    """Create, migrate and seed the database schema
+
+    Safe to run on every start. Everything after the journal mode switch
+    happens in a single transaction, so a failure leaves the database as it
+    was.
+    """
+    cursor = conn.cursor()
+
+    # WAL lets the dashboard read while the collector writes; the journal mode
+    # is persistent, so it only needs to be set once here
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+
+        # Sensors and congestion levels live in lookup tables; traffic_data rows
+        # only carry their integer ids
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sensors (
+                id INTEGER PRIMARY KEY,
+                name TEXT UNIQUE,
+                city TEXT,
+                tier TEXT
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS congestion_levels (
+                id INTEGER PRIMARY KEY,
+                label TEXT UNIQUE
+            )
+        """)
+
+        cursor.executemany(
+            "INSERT OR IGNORE INTO congestion_levels (id, label) VALUES (?, ?)",
+            CONGESTION_LEVELS,
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO sensors (name, city, tier) VALUES (?, ?, ?)",
+            INTERSECTIONS,
+        )
+
+        # Databases created before the lookup tables store sensor ids and
+        # congestion levels as text; move them aside to be converted below
+        columns = {
+            row[1] for row in cursor.execute("PRAGMA table_info(traffic_data)")
+        }
+        legacy = "congestion_level" in columns
+        if legacy:
+            cursor.execute("ALTER TABLE traffic_data RENAME TO traffic_data_legacy")
+            cursor.execute("DROP INDEX IF EXISTS idx_traffic_ts")
+            cursor.execute("DROP INDEX IF EXISTS idx_traffic_sensor_ts")
+            cursor.execute("DROP TABLE IF EXISTS agg_congestion")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS traffic_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sensor_id INTEGER REFERENCES sensors(id),
+                timestamp TEXT,
+                vehicle_count INTEGER,
+                avg_speed REAL,
+                congestion_level_id INTEGER REFERENCES congestion_levels(id),
+                predicted_flow INTEGER
+            )
+        """)
+
+        if legacy:
+            cursor.execute("""
+                INSERT OR IGNORE INTO sensors (name)
+                SELECT DISTINCT sensor_id FROM traffic_data_legacy
+            """)
+            cursor.execute("""
+                INSERT INTO traffic_data
+                (id, sensor_id, timestamp, vehicle_count, avg_speed,
+                 congestion_level_id, predicted_flow)
+                SELECT t.id, s.id, t.timestamp, t.vehicle_count, t.avg_speed,
+                       c.id, t.predicted_flow
+                FROM traffic_data_legacy t
+                LEFT JOIN sensors s ON s.name = t.sensor_id
+                LEFT JOIN congestion_levels c
+                    ON c.label = t.congestion_level COLLATE NOCASE
+            """)
+            cursor.execute("DROP TABLE traffic_data_legacy")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS health_reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                status TEXT,
+                issues_count INTEGER,
+                issues TEXT
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS future_predictions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                hour INTEGER,
+                predicted_flow INTEGER,
+                created_at TEXT
+            )
+        """)
+
+        # Indexes for the per-sensor, time-range and hour lookups
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_traffic_sensor_ts
+            ON traffic_data(sensor_id, timestamp DESC)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_traffic_ts ON traffic_data(timestamp)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_future_hour ON future_predictions(hour)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_health_ts ON health_reports(timestamp)
+        """)
+
+        # Running totals behind /api/analytics, maintained by bulk_insert_traffic
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS agg_hourly (
+                hour INTEGER PRIMARY KEY,
+                sum_vehicles INTEGER,
+                sum_speed REAL,
+                n INTEGER
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS agg_congestion (
+                congestion_level_id INTEGER PRIMARY KEY,
+                n INTEGER
+            )
+        """)
+
+        # Seed the totals from any existing history the first time they are
+        # created
+        if cursor.execute("SELECT COUNT(*) FROM agg_hourly").fetchone()[0] == 0:
+            cursor.execute("""
+                INSERT INTO agg_hourly (hour, sum_vehicles, sum_speed, n)
+                SELECT
+                    CAST(strftime('%H', timestamp) AS INTEGER) as hour,
+                    SUM(vehicle_count),
+                    SUM(avg_speed),
+                    COUNT(*)
+                FROM traffic_data
+                GROUP BY hour
+                HAVING hour IS NOT NULL
+            """)
+        if cursor.execute("SELECT COUNT(*) FROM agg_congestion").fetchone()[0] == 0:
+            cursor.execute("""
+                INSERT INTO agg_congestion (congestion_level_id, n)
+                SELECT congestion_level_id, COUNT(*)
+                FROM traffic_data
+                WHERE congestion_level_id IS NOT NULL
+                GROUP BY congestion_level_id
+            """)
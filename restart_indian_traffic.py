@@ -8,22 +8,55 @@ import os
 import sqlite3
 import sys
 
+# Summary shown after a successful reset, built once at compile time
+_INTERSECTION_REPORT = """
+🚀 Starting system with Indian traffic patterns...
+📍 Monitoring 12 intersections across 4 cities:
+   Delhi NCR:
+   • Connaught Place (HIGH)
+   • IFFCO Chowk, Gurgaon (HIGH)
+   • Lajpat Nagar (MEDIUM)
+   • Dwarka Sector 21 (LOW)
+   Bengaluru:
+   • Silk Board Junction (HIGH)
+   • Electronic City (HIGH)
+   • Jayanagar 4th Block (MEDIUM)
+   • Hebbal Flyover (LOW)
+   Mumbai:
+   • Bandra Kurla Complex (HIGH)
+   • Andheri East (MEDIUM)
+   Chennai:
+   • Adyar Signal (MEDIUM)
+   • OMR IT Corridor (LOW)
+
+🔄 Enhanced Features:
+   • Mixed congestion levels (High/Medium/Low)
+   • City-specific traffic multipliers (Mumbai 1.4x, Delhi/Blr 1.2x)
+   • Extended rush hours (7-11 AM, 4-9 PM)
+   • Congestion-based speed calculations
+   • Realistic traffic diversity across Indian cities
+
+▶️  Run: python run.py"""
+
 def clear_old_data():
     """Clear old NYC data and prepare for Indian traffic data"""
     try:
-        # Remove old database
-        if os.path.exists('traffic_data.db'):
-            os.remove('traffic_data.db')
-            print("✅ Cleared old traffic database")
-        
-        # Remove old model files
-        if os.path.exists('models/traffic_model.pkl'):
-            os.remove('models/traffic_model.pkl')
-            print("✅ Cleared old ML model")
-            
-        if os.path.exists('models/scaler.pkl'):
-            os.remove('models/scaler.pkl')
-            print("✅ Cleared old scaler model")
+        # Remove the old database (with its WAL sidecar files) and model files,
+        # attempting each removal directly rather than checking first
+        for path, message in [
+            ('traffic_data.db', "✅ Cleared old traffic database"),
+            ('traffic_data.db-wal', None),
+            ('traffic_data.db-shm', None),
+            ('models/traffic_model.pkl', "✅ Cleared old ML model"),
+            ('models/prediction_table.npy', None),
+            ('models/scaler.pkl', "✅ Cleared old scaler model"),
+        ]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            if message:
+                print(message)
         
         print("🇮🇳 Ready to start with Indian traffic data!")
         return True
@@ -38,31 +71,7 @@ def main():
     print("=" * 50)
     
     if clear_old_data():
-        print("\n🚀 Starting system with Indian traffic patterns...")
-        print("📍 Monitoring 12 intersections across 4 cities:")
-        print("   Delhi NCR:")
-        print("   • Connaught Place (HIGH)")
-        print("   • IFFCO Chowk, Gurgaon (HIGH)") 
-        print("   • Lajpat Nagar (MEDIUM)")
-        print("   • Dwarka Sector 21 (LOW)")
-        print("   Bengaluru:")
-        print("   • Silk Board Junction (HIGH)")
-        print("   • Electronic City (HIGH)")
-        print("   • Jayanagar 4th Block (MEDIUM)")
-        print("   • Hebbal Flyover (LOW)")
-        print("   Mumbai:")
-        print("   • Bandra Kurla Complex (HIGH)")
-        print("   • Andheri East (MEDIUM)")
-        print("   Chennai:")
-        print("   • Adyar Signal (MEDIUM)")
-        print("   • OMR IT Corridor (LOW)")
-        print("\n🔄 Enhanced Features:")
-        print("   • Mixed congestion levels (High/Medium/Low)")
-        print("   • City-specific traffic multipliers (Mumbai 1.4x, Delhi/Blr 1.2x)")
-        print("   • Extended rush hours (7-11 AM, 4-9 PM)")
-        print("   • Congestion-based speed calculations")
-        print("   • Realistic traffic diversity across Indian cities")
-        print("\n▶️  Run: python run.py")
+        print(_INTERSECTION_REPORT)
     else:
         print("❌ Failed to clear old data")
         sys.exit(1)
@@ -4,26 +4,22 @@ Smart Traffic Control System - Quick Start Script
 This script provides an easy way to run the system
 """
 
+import importlib.util
 import os
 import sys
-import subprocess
-import webbrowser
-import time
-import threading
 from pathlib import Path
 
 def check_dependencies():
     """Check if required dependencies are installed"""
-    try:
-        import flask
-        import pandas
-        import numpy
-        import sklearn
-        return True
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
-        print("📦 Run setup first: python setup.py")
-        return False
+    # Only look the packages up; importing them here would add their whole
+    # import time to every start and test run
+    for module in ('flask', 'flask_cors', 'waitress', 'orjson', 'pandas',
+                   'numpy', 'sklearn', 'joblib'):
+        if importlib.util.find_spec(module) is None:
+            print(f"❌ Missing dependency: No module named '{module}'")
+            print("📦 Run setup first: python setup.py")
+            return False
+    return True
 
 def start_application():
     """Start the Flask application"""
@@ -40,21 +36,24 @@ def start_application():
     
     try:
         # Import and run the application
-        from app import app, init_db, predictor
+        from app import app, init_db, refresh_model_if_stale
         
         # Initialize database
         print("🗄️ Initializing database...")
         init_db()
         
-        # Train ML model
-        print("🧠 Training ML model...")
-        predictor.train_model()
+        # Reuse the saved model, retraining it in the background once it is stale
+        refresh_model_if_stale()
         
         print("✅ System initialized successfully!")
         print("🌐 Starting web server...")
         print("📊 Dashboard will be available at: http://localhost:5000")
         
         # Open browser after a short delay
+        import threading
+        import time
+        import webbrowser
+        
         def open_browser():
             time.sleep(2)
             try:
@@ -68,8 +67,9 @@ def start_application():
         browser_thread.daemon = True
         browser_thread.start()
         
-        # Start the Flask application
-        app.run(debug=False, host='0.0.0.0', port=5000)
+        # Start the Flask application on a production WSGI server
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=5000, threads=8)
         
     except KeyboardInterrupt:
         print("\n🛑 System stopped by user")
@@ -80,23 +80,27 @@ def start_application():
 
 def show_help():
     """Show help information"""
-    print("🚦 Smart Traffic Control System - Quick Start")
-    print("=" * 50)
-    print("Usage: python run.py [option]")
-    print("")
-    print("Options:")
-    print("  start    Start the application (default)")
-    print("  setup    Run initial setup")
-    print("  test     Test system components")
-    print("  help     Show this help message")
-    print("")
-    print("Quick Start:")
-    print("1. python setup.py    # First time setup")
-    print("2. python run.py      # Start the system")
-    print("3. Open: http://localhost:5000")
+    sys.stdout.write("\n".join([
+        "🚦 Smart Traffic Control System - Quick Start",
+        "=" * 50,
+        "Usage: python run.py [option]",
+        "",
+        "Options:",
+        "  start    Start the application (default)",
+        "  setup    Run initial setup",
+        "  test     Test system components",
+        "  help     Show this help message",
+        "",
+        "Quick Start:",
+        "1. python setup.py    # First time setup",
+        "2. python run.py      # Start the system",
+        "3. Open: http://localhost:5000",
+    ]) + "\n")
 
 def run_setup():
     """Run the setup script"""
+    import subprocess
+    
     try:
         subprocess.run([sys.executable, 'setup.py'], check=True)
     except subprocess.CalledProcessError:
@@ -104,58 +108,72 @@ def run_setup():
         return False
     return True
 
-def test_system():
-    """Test system components"""
-    print("🧪 Testing Smart Traffic Control System...")
-    print("=" * 50)
-    
-    tests_passed = 0
-    total_tests = 4
-    
-    # Test 1: Dependencies
-    print("1. Testing dependencies...")
+def dependency_test():
+    """Check that the required packages are installed"""
     if check_dependencies():
-        print("   ✅ All dependencies available")
-        tests_passed += 1
-    else:
-        print("   ❌ Missing dependencies")
-    
-    # Test 2: Database
-    print("2. Testing database...")
+        return True, "✅ All dependencies available"
+    return False, "❌ Missing dependencies"
+
+def database_test():
+    """Check that the database can be opened"""
     try:
-        import sqlite3
-        conn = sqlite3.connect('traffic_data.db')
-        conn.close()
-        print("   ✅ Database connection successful")
-        tests_passed += 1
+        from db import get_connection
+        with get_connection(readonly=True) as conn:
+            conn.execute('SELECT 1')
+        return True, "✅ Database connection successful"
     except Exception as e:
-        print(f"   ❌ Database test failed: {e}")
-    
-    # Test 3: ML Model
-    print("3. Testing ML model...")
+        return False, f"❌ Database test failed: {e}"
+
+def model_test():
+    """Check that the ML model trains and predicts"""
     try:
         from app import TrafficPredictor
         predictor = TrafficPredictor()
         predictor.train_model()
         prediction = predictor.predict(12, 1, 0)  # Test prediction
-        print(f"   ✅ ML model working (sample prediction: {prediction})")
-        tests_passed += 1
+        return True, f"✅ ML model working (sample prediction: {prediction})"
     except Exception as e:
-        print(f"   ❌ ML model test failed: {e}")
-    
-    # Test 4: Web Application
-    print("4. Testing web application...")
+        return False, f"❌ ML model test failed: {e}"
+
+def web_app_test():
+    """Check that the web application responds"""
     try:
         from app import app
         with app.test_client() as client:
             response = client.get('/api/current-traffic')
             if response.status_code == 200:
-                print("   ✅ Web application responding")
-                tests_passed += 1
-            else:
-                print(f"   ❌ Web application error: {response.status_code}")
+                return True, "✅ Web application responding"
+            return False, f"❌ Web application error: {response.status_code}"
     except Exception as e:
-        print(f"   ❌ Web application test failed: {e}")
+        return False, f"❌ Web application test failed: {e}"
+
+def test_system():
+    """Test system components"""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    print("🧪 Testing Smart Traffic Control System...")
+    print("=" * 50)
+    
+    tests = [
+        ("Testing dependencies...", dependency_test),
+        ("Testing database...", database_test),
+        ("Testing ML model...", model_test),
+        ("Testing web application...", web_app_test),
+    ]
+    
+    # The tests are independent, so run them side by side; model training
+    # takes longest and the rest finish while it runs
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        futures = [executor.submit(test) for _, test in tests]
+    
+    tests_passed = 0
+    total_tests = len(tests)
+    
+    for number, ((title, _), future) in enumerate(zip(tests, futures), 1):
+        passed, message = future.result()
+        print(f"{number}. {title}")
+        print(f"   {message}")
+        tests_passed += passed
     
     print(f"\n📊 Test Results: {tests_passed}/{total_tests} tests passed")
     
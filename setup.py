@@ -8,19 +8,58 @@ import os
 import sys
 import subprocess
 import platform
-import sqlite3
-from pathlib import Path
+
+from db import get_connection, init_schema
 
 def create_directories():
     """Create necessary directories"""
     directories = ['logs', 'models', 'data', 'static', 'templates', 'scripts']
     
+    # One directory listing instead of a mkdir attempt per directory
+    with os.scandir('.') as entries:
+        existing = {entry.name for entry in entries if entry.is_dir()}
+    
     for directory in directories:
-        Path(directory).mkdir(exist_ok=True)
+        if directory not in existing:
+            os.mkdir(directory)
         print(f"✅ Created directory: {directory}")
 
+def requirements_satisfied(path='requirements.txt'):
+    """Check whether every requirement is already installed at a matching version"""
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+        from packaging.requirements import InvalidRequirement, Requirement
+    except ImportError:
+        return False
+    
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            try:
+                requirement = Requirement(line)
+            except InvalidRequirement:
+                # Options and anything else unusual are left to pip
+                return False
+            if requirement.marker and not requirement.marker.evaluate():
+                continue
+            try:
+                installed = version(requirement.name)
+            except PackageNotFoundError:
+                return False
+            if not requirement.specifier.contains(installed, prereleases=True):
+                return False
+    
+    return True
+
 def install_dependencies():
     """Install Python dependencies"""
+    # Reading installed package metadata is far cheaper than a pip run
+    if requirements_satisfied():
+        print("✅ Dependencies already installed")
+        return True
+    
     print("📦 Installing Python dependencies...")
     
     try:
@@ -37,46 +76,9 @@ def initialize_database():
     print("🗄️ Initializing database...")
     
     try:
-        conn = sqlite3.connect('traffic_data.db')
-        cursor = conn.cursor()
-        
-        # Create main traffic data table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS traffic_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sensor_id TEXT,
-                timestamp TEXT,
-                vehicle_count INTEGER,
-                avg_speed REAL,
-                congestion_level TEXT,
-                predicted_flow INTEGER
-            )
-        ''')
-        
-        # Create health reports table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS health_reports (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                status TEXT,
-                issues_count INTEGER,
-                issues TEXT
-            )
-        ''')
-        
-        # Create future predictions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS future_predictions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                hour INTEGER,
-                predicted_flow INTEGER,
-                created_at TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # The schema is shared with the app, which runs the same step on start
+        with get_connection() as conn:
+            init_schema(conn)
         
         print("✅ Database initialized successfully!")
         return True
@@ -106,6 +108,15 @@ def setup_windows_scheduling():
     }
     
     for filename, content in batch_files.items():
+        # Leave up-to-date files alone so their modification time is kept
+        try:
+            with open(filename) as f:
+                if f.read() == content:
+                    print(f"✅ {filename} is up to date")
+                    continue
+        except FileNotFoundError:
+            pass
+        
         with open(filename, 'w') as f:
             f.write(content)
         print(f"✅ Created {filename}")
@@ -194,16 +205,17 @@ def main():
     else:
         print("✅ Setup completed successfully!")
     
-    print("\n🚀 Next Steps:")
-    print("1. Run the application: python app.py")
-    print("2. Open browser: http://localhost:5000")
-    print("3. Check logs: tail -f logs/*.log (Unix) or type logs\\*.log (Windows)")
-    print("4. For deployment: python deploy.py or ./deploy.sh")
-    
-    print("\n📚 Documentation:")
-    print("- README.md: Project overview")
-    print("- PRESENTATION.md: Presentation guide")
-    print("- requirements.txt: Dependencies list")
+    sys.stdout.write("\n".join([
+        "\n🚀 Next Steps:",
+        "1. Run the application: python app.py",
+        "2. Open browser: http://localhost:5000",
+        "3. Check logs: tail -f logs/*.log (Unix) or type logs\\*.log (Windows)",
+        "4. For deployment: python deploy.py or ./deploy.sh",
+        "\n📚 Documentation:",
+        "- README.md: Project overview",
+        "- PRESENTATION.md: Presentation guide",
+        "- requirements.txt: Dependencies list",
+    ]) + "\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,16 +5,20 @@ Show information about the trained ML model
 
 import os
 import json
-import pickle
+import joblib
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # Optional, fall back to the standard library parser
+    orjson = None
+
 def show_model_info():
     """Display information about the trained model"""
     print("🧠 Smart Traffic Control - ML Model Information")
     print("=" * 50)
     
     model_path = 'models/traffic_model.pkl'
-    scaler_path = 'models/scaler.pkl'
     info_path = 'models/model_info.json'
     
     # Check if model files exist
@@ -26,30 +30,32 @@ def show_model_info():
     # Show file information
     print("📁 Model Files:")
     for file_path, description in [
-        (model_path, "Trained RandomForest model"),
-        (scaler_path, "Feature scaler"),
+        (model_path, "Trained gradient boosting model"),
         (info_path, "Model metadata")
     ]:
-        if os.path.exists(file_path):
-            size = os.path.getsize(file_path)
-            modified = datetime.fromtimestamp(os.path.getmtime(file_path))
+        # One stat call gives existence, size and modification time
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            print(f"  ❌ {file_path} - Missing")
+        else:
+            modified = datetime.fromtimestamp(st.st_mtime)
             print(f"  ✅ {file_path}")
-            print(f"     📊 Size: {size:,} bytes")
+            print(f"     📊 Size: {st.st_size:,} bytes")
             print(f"     🕒 Modified: {modified.strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"     📝 {description}")
-        else:
-            print(f"  ❌ {file_path} - Missing")
         print()
     
     # Load and display model information
     if os.path.exists(info_path):
         try:
-            with open(info_path, 'r') as f:
-                info = json.load(f)
+            with open(info_path, 'rb') as f:
+                data = f.read()
+            info = orjson.loads(data) if orjson else json.loads(data)
             
             print("🔍 Model Details:")
             print(f"  🤖 Type: {info.get('model_type', 'Unknown')}")
-            print(f"  🌳 Trees: {info.get('n_estimators', 'Unknown')}")
+            print(f"  🌳 Trees: {info.get('n_iter', info.get('n_estimators', 'Unknown'))}")
             print(f"  📊 Features: {', '.join(info.get('features', []))}")
             print(f"  🎯 Trained: {info.get('trained_at', 'Unknown')}")
             print(f"  ✅ Status: {'Ready' if info.get('is_trained', False) else 'Not trained'}")
@@ -62,22 +68,13 @@ def show_model_info():
         print("\n🔬 Technical Details:")
         
         # Load model
-        with open(model_path, 'rb') as f:
-            model = pickle.load(f)
+        model = joblib.load(model_path)
         
-        print(f"  🌲 Estimators: {model.n_estimators}")
+        print(f"  🌲 Boosting Iterations: {model.n_iter_}")
+        print(f"  📉 Learning Rate: {model.learning_rate}")
         print(f"  🎲 Random State: {model.random_state}")
         print(f"  📏 Max Depth: {model.max_depth}")
-        print(f"  🍃 Min Samples Split: {model.min_samples_split}")
-        
-        # Load scaler
-        with open(scaler_path, 'rb') as f:
-            scaler = pickle.load(f)
-        
-        print(f"  📊 Scaler Type: {type(scaler).__name__}")
-        if hasattr(scaler, 'mean_'):
-            print(f"  📈 Feature Means: {scaler.mean_}")
-            print(f"  📉 Feature Scales: {scaler.scale_}")
+        print(f"  🍃 Min Samples Leaf: {model.min_samples_leaf}")
         
     except Exception as e:
         print(f"⚠️ Error loading model details: {e}")
@@ -85,7 +82,7 @@ def show_model_info():
     print("\n🚀 Usage:")
     print("  • Model is automatically loaded when system starts")
     print("  • Predictions are made using this trained model")
-    print("  • Model is retrained and saved when system restarts")
+    print("  • On startup, a model over a day old is retrained in the background")
     print("  • Use 'python run.py' to start the traffic system")
 
 def main():
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for the Smart Traffic Control System
+Run with: waitress-serve --host=0.0.0.0 --port=5000 --threads=8 wsgi:app
+"""
+
+from app import app, init_db, refresh_model_if_stale, start_data_collection
+
+init_db()
+start_data_collection()
+refresh_model_if_stale()